@@ -1,12 +1,43 @@
+import io
 import os
 import sys
 import csv
+import gzip
+import mmap
 import logging
+import multiprocessing
+import shelve
+import time
+import threading
+import http.client
+import urllib.parse
 import xmlrpc.client
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import islice
 from dotenv import load_dotenv
-from typing import List, Dict, Optional, Union
+from typing import Any, Iterable, Iterator, List, Dict, Optional, Tuple, Union
 from decimal import Decimal
 
+# orjson is optional; it only speeds up JSON-RPC envelope (de)serialization
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    import json
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+    _json_loads = json.loads
+
+# zstandard is optional; it is only needed to read .csv.zst files
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -20,13 +51,103 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
-class OdooConfig:
-    def __init__(self):
-        self.url = os.getenv('ODOO_URL', 'http://localhost:8069')
-        self.db = os.getenv('ODOO_DB')
-        self.username = os.getenv('ODOO_USERNAME')
-        self.password = os.getenv('ODOO_PASSWORD')
+# Large read buffer keeps read() syscalls low on multi-MB price files
+CSV_BUFFER_SIZE = 1024 * 1024
+# Compressed inputs are decompressed while streaming
+COMPRESSED_SUFFIXES = ('.gz', '.zst')
+# Delimiters tried against the header line before falling back to csv.Sniffer
+CSV_DELIMITERS = (',', ';', '\t', '|')
+# Enough of the file for the Sniffer to see several full rows
+CSV_SNIFF_SAMPLE_SIZE = 64 * 1024
+
+# Files at least this large are split on line boundaries and parsed in worker
+# processes; fields must not contain embedded newlines
+PARALLEL_PARSE_MIN_BYTES = 256 * 1024 * 1024
+
+# Seconds before a JSON-RPC request gives up
+JSONRPC_TIMEOUT = 120
+
+# Barcodes per product.product search_read
+SEARCH_CHUNK_SIZE = 1000
+
+# Barcode -> product id lookups kept in memory, and how long persisted entries stay valid
+BARCODE_CACHE_SIZE = 100000
+BARCODE_CACHE_TTL_HOURS = 24
+
+def _parse_price_rows(rows: Iterable[List[str]], bc_idx: int, pr_idx: int,
+                      first_row_num: int) -> Tuple[Dict[str, float], Dict[str, List[int]], List[tuple], int]:
+    """Validate CSV rows, returning (mapping, row_numbers, row_errors, row_count).
+    
+    row_errors holds (row_number, barcode, error_message) tuples.
+    """
+    # barcode -> validated price; later rows override earlier ones
+    mapping: Dict[str, float] = {}
+    row_numbers: Dict[str, List[int]] = defaultdict(list)
+    row_errors = []
+    row_num = first_row_num - 1
+    
+    for row_num, row in enumerate(rows, start=first_row_num):
+        if not row:
+            continue  # Blank line, skipped as DictReader did
         
+        # Inlined _validate_barcode/_validate_price, run once per row
+        error_message = None
+        try:
+            barcode = row[bc_idx].strip()
+            price = row[pr_idx]
+        except IndexError:
+            error_message = "Row is missing barcode or price value"
+        else:
+            if not barcode:
+                error_message = "Barcode cannot be empty"
+            else:
+                try:
+                    price_float = float(price.strip().lstrip('$'))
+                except ValueError:
+                    price_float = -1.0
+                if price_float < 0:
+                    error_message = f"Invalid price format: {price}"
+                else:
+                    if barcode in mapping:
+                        logger.warning("barcode %s appears %d times; using last price",
+                                       barcode, len(row_numbers[barcode]) + 1)
+                    mapping[barcode] = price_float
+                    row_numbers[barcode].append(row_num)
+        
+        if error_message:
+            row_errors.append((row_num, row[bc_idx] if bc_idx < len(row) else 'N/A', error_message))
+    
+    return mapping, row_numbers, row_errors, row_num - first_row_num + 1
+
+def _parse_csv_segment(args: Tuple[str, int, int, str, int, int]) -> Tuple[Dict[str, float], Dict[str, List[int]], List[tuple], int]:
+    # Runs in a worker process; row numbers are relative to the segment start
+    csv_file_path, start, end, delimiter, bc_idx, pr_idx = args
+    with open(csv_file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = mm[start:end].decode('utf-8')
+    reader = csv.reader(io.StringIO(text, newline=''), delimiter=delimiter)
+    return _parse_price_rows(reader, bc_idx, pr_idx, 0)
+
+@dataclass(frozen=True, slots=True)
+class OdooConfig:
+    # Immutable, so one instance is safely shared by every thread's proxy
+    url: str
+    db: str
+    username: str
+    password: str = field(repr=False)
+    protocol: str = 'xmlrpc'
+    
+    @classmethod
+    def from_env(cls) -> 'OdooConfig':
+        return cls(
+            url=os.getenv('ODOO_URL', 'http://localhost:8069'),
+            db=os.getenv('ODOO_DB'),
+            username=os.getenv('ODOO_USERNAME'),
+            password=os.getenv('ODOO_PASSWORD'),
+            protocol=os.getenv('ODOO_PROTOCOL', 'xmlrpc')
+        )
+    
+    def __post_init__(self) -> None:
         self._validate_config()
     
     def _validate_config(self) -> None:
@@ -40,18 +161,181 @@ class OdooConfig:
         
         if missing_vars:
             raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
+        
+        if self.protocol not in ('xmlrpc', 'jsonrpc'):
+            raise ValueError(f"ODOO_PROTOCOL must be 'xmlrpc' or 'jsonrpc', got: {self.protocol}")
+
+class OdooJsonRpcError(Exception):
+    pass
+
+class OdooJsonRpcClient:
+    """Calls one Odoo service over /jsonrpc, used like an xmlrpc.client.ServerProxy."""
+    
+    def __init__(self, url: str, service: str, timeout: float = JSONRPC_TIMEOUT):
+        parsed = urllib.parse.urlsplit(url)
+        self._service = service
+        self._timeout = timeout
+        self._host = parsed.netloc
+        self._path = parsed.path.rstrip('/') + '/jsonrpc'
+        self._connection_class = http.client.HTTPSConnection if parsed.scheme == 'https' else http.client.HTTPConnection
+        self._connection = None
+        self._request_id = 0
+    
+    def __getattr__(self, method: str):
+        if method.startswith('_'):
+            raise AttributeError(method)
+        return partial(self._call, method)
+    
+    def _call(self, method: str, *args: Any) -> Any:
+        self._request_id += 1
+        payload = _json_dumps({
+            'jsonrpc': '2.0',
+            'method': 'call',
+            'params': {'service': self._service, 'method': method, 'args': list(args)},
+            'id': self._request_id
+        })
+        
+        # Connection is kept open between calls; retry once if the server dropped it
+        for attempt in range(2):
+            if self._connection is None:
+                self._connection = self._connection_class(self._host, timeout=self._timeout)
+            try:
+                self._connection.request('POST', self._path, body=payload, headers={'Content-Type': 'application/json'})
+                response = self._connection.getresponse()
+                body = response.read()
+                break
+            except Exception as e:
+                # Any failure can leave http.client mid-request, so always start over
+                self._connection.close()
+                self._connection = None
+                if attempt or not isinstance(e, (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)):
+                    raise
+        
+        if response.status != 200:
+            raise OdooJsonRpcError(f"HTTP {response.status} from {self._path}")
+        
+        reply = _json_loads(body)
+        error = reply.get('error')
+        if error:
+            raise OdooJsonRpcError((error.get('data') or {}).get('message') or error.get('message'))
+        return reply.get('result')
+
+class BarcodeCache:
+    """LRU map of barcode -> product.template ids, optionally persisted with shelve.
+    
+    Persisted entries are keyed by namespace (the Odoo URL and database) so ids
+    cached for one database are never used against another. Cached ids are
+    trusted until the TTL expires, so only persist when barcodes are not
+    reassigned between products. Only the updater's calling thread uses it;
+    worker threads just run RPCs.
+    """
+    
+    def __init__(self, maxsize: int = BARCODE_CACHE_SIZE, path: Optional[str] = None,
+                 ttl_hours: float = BARCODE_CACHE_TTL_HOURS, namespace: str = ''):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_hours * 3600
+        self.namespace = namespace
+        self._entries: OrderedDict = OrderedDict()
+        self._shelf = shelve.open(path) if path else None
+    
+    def get_many(self, barcodes: Iterable[str]) -> Dict[str, List[int]]:
+        found = {}
+        now = time.time()
+        for barcode in barcodes:
+            stored = self._entries.get(barcode)
+            if stored is not None:
+                if now - stored[1] > self.ttl_seconds:
+                    self.evict([barcode])
+                    continue
+                self._entries.move_to_end(barcode)
+            elif self._shelf is not None:
+                key = self._shelf_key(barcode)
+                stored = self._shelf.get(key)
+                if stored is None:
+                    continue
+                if now - stored[1] > self.ttl_seconds:
+                    del self._shelf[key]
+                    continue
+                # Keep the original stored_at so the TTL still counts from the search
+                self._remember(barcode, stored)
+            else:
+                continue
+            found[barcode] = list(stored[0])
+        return found
+    
+    def put_many(self, barcode_to_ids: Dict[str, List[int]]) -> None:
+        now = time.time()
+        for barcode, ids in barcode_to_ids.items():
+            stored = (tuple(ids), now)
+            self._remember(barcode, stored)
+            if self._shelf is not None:
+                self._shelf[self._shelf_key(barcode)] = stored
+    
+    def evict(self, barcodes: Iterable[str]) -> None:
+        for barcode in barcodes:
+            self._entries.pop(barcode, None)
+            if self._shelf is not None:
+                self._shelf.pop(self._shelf_key(barcode), None)
+    
+    def close(self) -> None:
+        if self._shelf is not None:
+            self._shelf.close()
+            self._shelf = None
+    
+    def _shelf_key(self, barcode: str) -> str:
+        return f'{self.namespace}|{barcode}'
+    
+    def _remember(self, barcode: str, stored: Tuple[tuple, float]) -> None:
+        # stored is (ids, stored_at), the same shape as the shelf values
+        self._entries[barcode] = stored
+        self._entries.move_to_end(barcode)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
 
 class OdooPriceUpdater:
-    def __init__(self, config: OdooConfig):
+    def __init__(self, config: OdooConfig, verbose: bool = False,
+                 barcode_cache_path: Optional[str] = None, max_workers: int = 8):
         self.config = config
+        # Per-row/per-group logging in batch runs; summaries are always logged
+        self.verbose = verbose
         self.common = None
         self.models = None
         self.uid = None
+        # Cleared the first time the server rejects system.multicall
+        self._multicall_supported = True
+        # Searches and price-group writes touch disjoint products, so they run
+        # concurrently; the executor lives as long as the updater so each worker
+        # keeps its connection between batches
+        self.max_workers = max_workers
+        self._executor = None
+        # ServerProxy shares HTTP connection state, so each thread gets its own
+        self._local = threading.local()
+        # Skips repeated barcode searches; persisted between runs when a path is given
+        self.barcode_cache = BarcodeCache(
+            path=barcode_cache_path,
+            namespace=f'{config.url}|{config.db}'
+        )
         
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self.barcode_cache.close()
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+    
     def connect(self) -> bool:
         try:
             logger.info(f"Connecting to Odoo at {self.config.url}")
-            self.common = xmlrpc.client.ServerProxy(f'{self.config.url}/xmlrpc/2/common')
+            if self.config.protocol == 'jsonrpc':
+                self.common = OdooJsonRpcClient(self.config.url, 'common')
+            else:
+                # common and object endpoints share one transport, so one connection
+                transport = self._make_transport()
+                self.common = xmlrpc.client.ServerProxy(f'{self.config.url}/xmlrpc/2/common', transport=transport)
             
             # Test connection
             version_info = self.common.version()
@@ -69,16 +353,49 @@ class OdooPriceUpdater:
                 raise ValueError("Authentication failed - invalid credentials")
                 
             logger.info(f"Successfully authenticated as user ID: {self.uid}")
-            self.models = xmlrpc.client.ServerProxy(f'{self.config.url}/xmlrpc/2/object')
+            if self.config.protocol == 'jsonrpc':
+                self.models = OdooJsonRpcClient(self.config.url, 'object')
+            else:
+                self.models = xmlrpc.client.ServerProxy(f'{self.config.url}/xmlrpc/2/object', transport=transport)
+            self._local.models = self.models
+            self._local.execute = partial(self.models.execute_kw, self.config.db, self.uid, self.config.password)
             return True
             
         except Exception as e:
             logger.error(f"Connection failed: {str(e)}")
             return False
     
+    def _make_transport(self) -> xmlrpc.client.Transport:
+        # Transport speaks HTTP/1.1 and reuses its cached connection, so sharing
+        # one between proxies shares the socket
+        if self.config.url.startswith('https://'):
+            return xmlrpc.client.SafeTransport()
+        return xmlrpc.client.Transport()
+    
+    def _get_models(self) -> Union[xmlrpc.client.ServerProxy, OdooJsonRpcClient]:
+        models = getattr(self._local, 'models', None)
+        if models is None:
+            if self.config.protocol == 'jsonrpc':
+                models = OdooJsonRpcClient(self.config.url, 'object')
+            else:
+                models = xmlrpc.client.ServerProxy(
+                    f'{self.config.url}/xmlrpc/2/object',
+                    transport=self._make_transport()
+                )
+            self._local.models = models
+        return models
+    
+    def _get_exec(self):
+        # execute_kw with db, uid and password already bound
+        execute = getattr(self._local, 'execute', None)
+        if execute is None:
+            execute = partial(self._get_models().execute_kw, self.config.db, self.uid, self.config.password)
+            self._local.execute = execute
+        return execute
+    
     def _validate_price(self, price: Union[str, float, Decimal]) -> float:
         try:
-            price_float = float(price)
+            price_float = float(price.strip().lstrip('$')) if isinstance(price, str) else float(price)
             if price_float < 0:
                 raise ValueError("Price cannot be negative")
             return price_float
@@ -90,39 +407,52 @@ class OdooPriceUpdater:
             raise ValueError("Barcode cannot be empty")
         return str(barcode).strip()
     
+    def _validate_batch_size(self, batch_size: int) -> None:
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got: {batch_size}")
+    
     def update_product_price(self, barcode: str, new_price: Union[str, float, Decimal]) -> Dict[str, Union[bool, str, int]]:
         try:
             # Validate inputs
             validated_barcode = self._validate_barcode(barcode)
             validated_price = self._validate_price(new_price)
             
-            logger.info(f"Searching for products with barcode: {validated_barcode}")
+            logger.info("Searching for products with barcode: %s", validated_barcode)
+            
+            execute = self._get_exec()
             
             # Find products with this barcode
-            product_ids = self.models.execute_kw(
-                self.config.db, self.uid, self.config.password,
-                'product.template', 'search',
-                [[['barcode', '=', validated_barcode]]]
-            )
+            product_ids = self.barcode_cache.get_many([validated_barcode]).get(validated_barcode)
+            if product_ids is None:
+                product_ids = execute(
+                    'product.template', 'search',
+                    [[['barcode', '=', validated_barcode]]]
+                )
+                if product_ids:
+                    self.barcode_cache.put_many({validated_barcode: product_ids})
             
             if not product_ids:
-                logger.warning(f"No products found with barcode: {validated_barcode}")
+                logger.warning("No products found with barcode: %s", validated_barcode)
                 return {
                     'success': False,
                     'message': f'No products found with barcode: {validated_barcode}',
                     'updated_count': 0
                 }
             
-            logger.info(f"Found {len(product_ids)} product(s) with barcode: {validated_barcode}")
+            logger.info("Found %d product(s) with barcode: %s", len(product_ids), validated_barcode)
             
             # Update products
-            self.models.execute_kw(
-                self.config.db, self.uid, self.config.password,
-                'product.template', 'write',
-                [product_ids, {'list_price': validated_price}]
-            )
+            try:
+                execute(
+                    'product.template', 'write',
+                    [product_ids, {'list_price': validated_price}]
+                )
+            except Exception:
+                # Cached ids may be stale; search again next time
+                self.barcode_cache.evict([validated_barcode])
+                raise
             
-            logger.info(f"Successfully updated {len(product_ids)} product(s) with barcode {validated_barcode} to ${validated_price}")
+            logger.info("Successfully updated %d product(s) with barcode %s to $%s", len(product_ids), validated_barcode, validated_price)
             
             return {
                 'success': True,
@@ -139,69 +469,366 @@ class OdooPriceUpdater:
                 'updated_count': 0
             }
     
-    def batch_update_from_csv(self, csv_file_path: str) -> Dict[str, Union[int, List[Dict]]]:
-        if not os.path.exists(csv_file_path):
-            raise FileNotFoundError(f"CSV file not found: {csv_file_path}")
+    def _open_csv(self, csv_file_path: str):
+        suffix = os.path.splitext(csv_file_path)[1].lower()
+        if suffix == '.gz':
+            raw = gzip.GzipFile(csv_file_path, 'rb')
+        elif suffix == '.zst':
+            if zstandard is None:
+                raise ImportError("Reading .zst files requires the zstandard package")
+            raw = zstandard.ZstdDecompressor().stream_reader(open(csv_file_path, 'rb'))
+        else:
+            return open(csv_file_path, 'r', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE)
+        return io.TextIOWrapper(io.BufferedReader(raw, buffer_size=CSV_BUFFER_SIZE), encoding='utf-8', newline='')
+    
+    def _detect_delimiter(self, csvfile) -> str:
+        # The header must split into the barcode column on exactly one delimiter
+        header = csvfile.readline()
+        candidates = [
+            d for d in CSV_DELIMITERS
+            if d in header and 'barcode' in [field.strip().strip('"') for field in header.split(d)]
+        ]
+        if len(candidates) == 1:
+            return candidates[0]
+        
+        # Ambiguous header, try to detect delimiter, default to comma
+        # A negative size would read (or decompress) the whole file
+        sample = header + csvfile.read(max(0, CSV_SNIFF_SAMPLE_SIZE - len(header)))
+        try:
+            sniffer = csv.Sniffer()
+            return sniffer.sniff(sample, delimiters=''.join(CSV_DELIMITERS)).delimiter
+        except csv.Error:
+            return ','  # Default to comma if detection fails
+    
+    def _write_price_groups(self, price_to_ids: Dict[float, List[int]]) -> Dict[float, str]:
+        """Write each price group, returning error messages keyed by failed price."""
+        groups = list(price_to_ids.items())
+        logger.info("Writing %d price group(s) covering %d product(s), largest group %d",
+                    len(groups), sum(len(ids) for _, ids in groups), max((len(ids) for _, ids in groups), default=0))
+        
+        # system.multicall is XML-RPC only, and Odoo's object endpoint may not offer it
+        if self.config.protocol == 'jsonrpc' or not self._multicall_supported:
+            return self._write_groups_individually(groups)
+        
+        multicall = xmlrpc.client.MultiCall(self._get_models())
+        multicall_execute = partial(multicall.execute_kw, self.config.db, self.uid, self.config.password)
+        for price, ids in groups:
+            multicall_execute(
+                'product.template', 'write',
+                [ids, {'list_price': price}]
+            )
+        
+        try:
+            responses = multicall()
+        except xmlrpc.client.Fault as e:
+            # Endpoint does not support system.multicall; stop trying it for this updater
+            logger.warning("Multicall unavailable, writing price groups individually: %s", e.faultString)
+            self._multicall_supported = False
+            return self._write_groups_individually(groups)
+        except Exception as e:
+            logger.error("Error writing %d price group(s): %s", len(groups), e)
+            return {price: str(e) for price, _ in groups}
+        
+        failed_prices = {}
+        for index, (price, ids) in enumerate(groups):
+            try:
+                responses[index]
+                if self.verbose:
+                    logger.info("Successfully updated %d product(s) to $%s", len(ids), price)
+            except xmlrpc.client.Fault as e:
+                logger.error("Error updating %d product(s) to $%s: %s", len(ids), price, e)
+                failed_prices[price] = str(e)
+        
+        return failed_prices
+    
+    def _write_groups_individually(self, groups: List[tuple]) -> Dict[float, str]:
+        errors = self._get_executor().map(lambda group: self._write_group(*group), groups)
+        return {price: error for (price, _), error in zip(groups, errors) if error is not None}
+    
+    def _write_group(self, price: float, ids: List[int]) -> Optional[str]:
+        # Runs on a worker thread; returns the error message if the write failed
+        try:
+            self._get_exec()(
+                'product.template', 'write',
+                [ids, {'list_price': price}]
+            )
+            if self.verbose:
+                logger.info("Successfully updated %d product(s) to $%s", len(ids), price)
+            return None
+        except Exception as e:
+            logger.error("Error updating %d product(s) to $%s: %s", len(ids), price, e)
+            return str(e)
+    
+    def _search_chunk(self, barcodes: List[str]) -> List[Dict]:
+        # Runs on a worker thread
+        return self._get_exec()(
+            'product.product', 'search_read',
+            [[['barcode', 'in', barcodes]]],
+            {'fields': ['barcode', 'product_tmpl_id'], 'limit': 0}
+        )
+    
+    def _bulk_update(self, mapping: Dict[str, float], row_numbers: Dict[str, List[int]]) -> List[Dict]:
+        """Update every barcode in mapping with one search and one write per distinct price."""
+        barcode_to_ids = self.barcode_cache.get_many(mapping)
+        barcodes = [barcode for barcode in mapping if barcode not in barcode_to_ids]
+        
+        # One IN query per chunk keeps each request payload bounded
+        searched: Dict[str, List[int]] = {}
+        chunks = [barcodes[start:start + SEARCH_CHUNK_SIZE] for start in range(0, len(barcodes), SEARCH_CHUNK_SIZE)]
+        try:
+            for chunk, products in zip(chunks, self._get_executor().map(self._search_chunk, chunks)):
+                requested = set(chunk)
+                for product in products:
+                    # Key hits by the barcode that was searched for; anything else
+                    # (e.g. barcode False) must never reach mapping or the cache
+                    if product['barcode'] not in requested:
+                        continue
+                    # Barcodes live on the variant; list_price lives on its template
+                    template_ids = searched.setdefault(product['barcode'], [])
+                    template_id = product['product_tmpl_id'][0]
+                    if template_id not in template_ids:
+                        template_ids.append(template_id)
+        except Exception as e:
+            # Fail this batch's rows and let the run continue with the next batch
+            logger.error("Error searching %d barcode(s): %s", len(barcodes), e)
+            return [
+                {
+                    'success': False,
+                    'message': f"Error updating product with barcode {barcode}: {str(e)}",
+                    'updated_count': 0,
+                    'barcode': barcode,
+                    'row_number': row_num
+                }
+                for barcode in mapping
+                for row_num in row_numbers[barcode]
+            ]
+        self.barcode_cache.put_many(searched)
+        barcode_to_ids.update(searched)
+        logger.info("Found products for %d of %d barcode(s), %d from cache",
+                    len(barcode_to_ids), len(mapping), len(mapping) - len(barcodes))
+        
+        # Several barcodes can resolve to one template (variants, or ids cached by
+        # update_product_price); the latest row wins so price groups stay disjoint
+        template_owners: Dict[int, str] = {}
+        for barcode in sorted(barcode_to_ids, key=lambda b: max(row_numbers[b])):
+            for template_id in barcode_to_ids[barcode]:
+                previous = template_owners.get(template_id)
+                if previous is not None and mapping[previous] != mapping[barcode]:
+                    logger.warning("Product template %d listed under barcodes %s ($%s) and %s ($%s); using row %d",
+                                   template_id, previous, mapping[previous], barcode, mapping[barcode],
+                                   max(row_numbers[barcode]))
+                template_owners[template_id] = barcode
+        
+        price_to_ids: Dict[float, List[int]] = {}
+        for template_id, barcode in template_owners.items():
+            price_to_ids.setdefault(mapping[barcode], []).append(template_id)
+        
+        # One write per distinct price, sent in a single multicall
+        failed_prices = self._write_price_groups(price_to_ids)
+        if failed_prices:
+            # Cached ids may be stale; search again next time
+            self.barcode_cache.evict(b for b, ids in barcode_to_ids.items() if mapping[b] in failed_prices)
+        
+        missing_barcodes = set(mapping) - set(barcode_to_ids)
+        if missing_barcodes:
+            logger.warning("No products found for %d barcode(s): %s",
+                           len(missing_barcodes), ', '.join(sorted(missing_barcodes)))
         
         results = []
-        successful_updates = 0
-        failed_updates = 0
+        for barcode, price in mapping.items():
+            ids = [i for i in barcode_to_ids.get(barcode, []) if template_owners[i] == barcode]
+            superseded = len(barcode_to_ids.get(barcode, [])) - len(ids)
+            if barcode in missing_barcodes:
+                result = {
+                    'success': False,
+                    'message': f'No products found with barcode: {barcode}',
+                    'updated_count': 0
+                }
+            elif ids and price in failed_prices:
+                result = {
+                    'success': False,
+                    'message': f"Error updating product with barcode {barcode}: {failed_prices[price]}",
+                    'updated_count': 0
+                }
+            else:
+                result = {
+                    'success': True,
+                    'message': f'Updated {len(ids)} product(s) to ${price}',
+                    'updated_count': len(ids)
+                }
+                if superseded:
+                    result['message'] += f' ({superseded} superseded by a later row)'
+            result['barcode'] = barcode
+            # Report the outcome against every row that listed this barcode
+            for row_num in row_numbers[barcode]:
+                results.append(dict(result, row_number=row_num))
+        
+        return results
+    
+    def _flush_batch(self, mapping: Dict[str, float], row_numbers: Dict[str, List[int]],
+                     row_errors: List[tuple]) -> List[Dict]:
+        results = self._bulk_update(mapping, row_numbers) if mapping else []
+        for row_num, barcode, error_message in row_errors:
+            results.append({
+                'success': False,
+                'message': f'Row {row_num} error: {error_message}',
+                'updated_count': 0,
+                'row_number': row_num,
+                'barcode': barcode
+            })
+        results.sort(key=lambda r: r['row_number'])
+        return results
+    
+    def _iter_parallel_batches(self, csv_file_path: str, delimiter: str,
+                               bc_idx: int, pr_idx: int, batch_size: int) -> Iterator[List[Dict]]:
+        """Parse a large CSV in parallel segments, then flush the merged mapping in batches."""
+        workers = os.cpu_count() or 1
         
-        logger.info(f"Processing batch update from CSV: {csv_file_path}")
+        with open(csv_file_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                size = mm.size()
+                data_start = mm.find(b'\n') + 1  # Skip the header line
+                # Snap each split point forward to the start of the next line
+                boundaries = [data_start]
+                for i in range(1, workers):
+                    newline = mm.find(b'\n', max(data_start, size * i // workers))
+                    boundary = size if newline == -1 else newline + 1
+                    if boundary > boundaries[-1]:
+                        boundaries.append(boundary)
+                if boundaries[-1] < size:
+                    boundaries.append(size)
+        
+        segments = [
+            (csv_file_path, start, end, delimiter, bc_idx, pr_idx)
+            for start, end in zip(boundaries, boundaries[1:])
+        ]
+        logger.info("Parsing %d segment(s) of %s in %d process(es)", len(segments), csv_file_path, workers)
+        
+        with multiprocessing.Pool(workers) as pool:
+            parsed = pool.map(_parse_csv_segment, segments)
+        
+        # Merge in file order so later rows still override earlier ones
+        mapping: Dict[str, float] = {}
+        row_numbers: Dict[str, List[int]] = defaultdict(list)
+        row_errors = []
+        row_offset = 2  # Start at 2 to account for header
+        for seg_mapping, seg_row_numbers, seg_errors, seg_row_count in parsed:
+            for barcode, price in seg_mapping.items():
+                if barcode in mapping:
+                    logger.warning("barcode %s appears %d times; using last price",
+                                   barcode, len(row_numbers[barcode]) + len(seg_row_numbers[barcode]))
+                mapping[barcode] = price
+                row_numbers[barcode].extend(n + row_offset for n in seg_row_numbers[barcode])
+            row_errors.extend((n + row_offset, barcode, message) for n, barcode, message in seg_errors)
+            row_offset += seg_row_count
+        
+        barcodes = list(mapping)
+        for start in range(0, max(len(barcodes), 1), batch_size):
+            batch = barcodes[start:start + batch_size]
+            yield self._flush_batch(
+                {barcode: mapping[barcode] for barcode in batch},
+                {barcode: row_numbers[barcode] for barcode in batch},
+                row_errors if start == 0 else []
+            )
+    
+    def _iter_update_batches(self, csv_file_path: str, batch_size: int) -> Iterator[List[Dict]]:
+        """Stream the CSV, flushing every batch_size rows and yielding that batch's row results."""
+        if not os.path.exists(csv_file_path):
+            raise FileNotFoundError(f"CSV file not found: {csv_file_path}")
+        
+        logger.info("Processing batch update from CSV: %s", csv_file_path)
         
         try:
-            with open(csv_file_path, 'r', newline='', encoding='utf-8') as csvfile:
-                # Try to detect delimiter, default to comma
-                sample = csvfile.read(1024)
-                csvfile.seek(0)
-                try:
-                    sniffer = csv.Sniffer()
-                    delimiter = sniffer.sniff(sample).delimiter
-                except csv.Error:
-                    delimiter = ','  # Default to comma if detection fails
-                
-                reader = csv.DictReader(csvfile, delimiter=delimiter)
+            # Reopen rather than seek, decompressing streams cannot rewind
+            with self._open_csv(csv_file_path) as csvfile:
+                delimiter = self._detect_delimiter(csvfile)
+            
+            with self._open_csv(csv_file_path) as csvfile:
+                reader = csv.reader(csvfile, delimiter=delimiter)
+                header = next(reader, [])
                 
-                logger.info(f"Using delimiter: '{delimiter}'")
-                logger.info(f"CSV columns detected: {reader.fieldnames}")
+                logger.info("Using delimiter: '%s'", delimiter)
+                logger.info("CSV columns detected: %s", header)
                 
                 # Validate required columns
                 required_columns = {'barcode', 'price'}
-                if not required_columns.issubset(reader.fieldnames):
-                    raise ValueError(f"CSV must contain columns: {required_columns}. Found: {reader.fieldnames}")
+                if not required_columns.issubset(header):
+                    raise ValueError(f"CSV must contain columns: {required_columns}. Found: {header}")
                 
-                for row_num, row in enumerate(reader, start=2):  # Start at 2 to account for header
-                    try:
-                        barcode = row['barcode']
-                        price = row['price']
-                        
-                        result = self.update_product_price(barcode, price)
-                        result['row_number'] = row_num
-                        result['barcode'] = barcode
-                        
-                        if result['success']:
-                            successful_updates += 1
-                        else:
-                            failed_updates += 1
-                            
-                        results.append(result)
-                        
-                    except Exception as e:
-                        error_result = {
-                            'success': False,
-                            'message': f'Row {row_num} error: {str(e)}',
-                            'updated_count': 0,
-                            'row_number': row_num,
-                            'barcode': row.get('barcode', 'N/A')
-                        }
-                        results.append(error_result)
-                        failed_updates += 1
-                        
+                # Index rows directly instead of building a dict per row
+                bc_idx = header.index('barcode')
+                pr_idx = header.index('price')
+                
+                if (not csv_file_path.lower().endswith(COMPRESSED_SUFFIXES)
+                        and os.path.getsize(csv_file_path) >= PARALLEL_PARSE_MIN_BYTES):
+                    yield from self._iter_parallel_batches(
+                        csv_file_path, delimiter, bc_idx, pr_idx, batch_size
+                    )
+                    return
+                
+                row_num = 2  # Start at 2 to account for header
+                while True:
+                    mapping, row_numbers, row_errors, row_count = _parse_price_rows(
+                        islice(reader, batch_size), bc_idx, pr_idx, row_num
+                    )
+                    if not row_count:
+                        break
+                    row_num += row_count
+                    yield self._flush_batch(mapping, row_numbers, row_errors)
+                    
         except Exception as e:
-            logger.error(f"Error processing CSV file: {str(e)}")
+            logger.error("Error processing CSV file: %s", e)
             raise
+    
+    def batch_update_from_csv(self, csv_file_path: str, batch_size: int = 1000,
+                              failed_csv_path: Optional[str] = None) -> Iterator[Dict[str, Union[int, List[Dict]]]]:
+        """Yield a summary per flushed batch; only failed rows are kept, optionally on disk."""
+        # Validate here so a bad batch_size raises on the call, not on first iteration
+        self._validate_batch_size(batch_size)
+        return self._iter_batch_summaries(csv_file_path, batch_size, failed_csv_path)
+    
+    def _iter_batch_summaries(self, csv_file_path: str, batch_size: int,
+                              failed_csv_path: Optional[str]) -> Iterator[Dict[str, Union[int, List[Dict]]]]:
+        failed_file = open(failed_csv_path, 'w', newline='', encoding='utf-8') if failed_csv_path else None
+        try:
+            failed_writer = None
+            if failed_file:
+                failed_writer = csv.DictWriter(
+                    failed_file,
+                    fieldnames=['row_number', 'barcode', 'message'],
+                    extrasaction='ignore'
+                )
+                failed_writer.writeheader()
+            
+            for results in self._iter_update_batches(csv_file_path, batch_size):
+                failed = [r for r in results if not r['success']]
+                successful_updates = len(results) - len(failed)
+                
+                logger.info("Batch processed: %d row(s), %d failed", len(results), len(failed))
+                
+                if failed_writer:
+                    failed_writer.writerows(failed)
+                    failed = []
+                
+                yield {
+                    'processed': len(results),
+                    'successful_updates': successful_updates,
+                    'failed': failed
+                }
+        finally:
+            if failed_file:
+                failed_file.close()
+    
+    def bulk_update_from_csv(self, csv_file_path: str, batch_size: int = 1000) -> Dict[str, Union[int, List[Dict]]]:
+        self._validate_batch_size(batch_size)
+        results = []
+        for batch in self._iter_update_batches(csv_file_path, batch_size):
+            results.extend(batch)
+        
+        successful_updates = sum(1 for r in results if r['success'])
+        failed_updates = len(results) - successful_updates
         
-        logger.info(f"Batch update completed. Successful: {successful_updates}, Failed: {failed_updates}")
+        logger.info("Bulk update completed. Successful: %d, Failed: %d", successful_updates, failed_updates)
         
         return {
             'successful_updates': successful_updates,
@@ -213,23 +840,26 @@ class OdooPriceUpdater:
 def main():
     try:
         # Load configuration
-        config = OdooConfig()
+        config = OdooConfig.from_env()
         
         # Create updater instance
         updater = OdooPriceUpdater(config)
         
-        # Connect to Odoo
-        if not updater.connect():
-            logger.error("Failed to connect to Odoo")
-            sys.exit(1)
-        
-        # Example single update
-        result = updater.update_product_price('610377036979', 29.99)
-        logger.info(f"Single update result: {result}")
-        
-        # Example batch update
-        batch_result = updater.batch_update_from_csv('price_updates.csv')
-        logger.info(f"Batch update result: {batch_result}")
+        try:
+            # Connect to Odoo
+            if not updater.connect():
+                logger.error("Failed to connect to Odoo")
+                sys.exit(1)
+            
+            # Example single update
+            result = updater.update_product_price('610377036979', 29.99)
+            logger.info(f"Single update result: {result}")
+            
+            # Example batch update
+            batch_result = updater.bulk_update_from_csv('price_updates.csv')
+            logger.info(f"Batch update result: {batch_result}")
+        finally:
+            updater.close()
         
     except Exception as e:
         logger.error(f"Application error: {str(e)}")
@@ -0,0 +1,120 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import priceupdate
+from priceupdate import BarcodeCache, OdooConfig, OdooPriceUpdater
+
+
+class FakeOdoo:
+    """execute_kw stand-in holding product.product variants and template prices."""
+    
+    def __init__(self, variants):
+        # variant barcode -> template id
+        self.variants = variants
+        self.prices = {}
+        self.extra_hits = []
+    
+    def __call__(self, model, method, args, kwargs=None):
+        if model == 'product.product' and method == 'search_read':
+            (_, _, barcodes), = args[0]
+            hits = [
+                {'barcode': barcode, 'product_tmpl_id': [template_id, f'Template {template_id}']}
+                for barcode, template_id in self.variants.items() if barcode in barcodes
+            ]
+            return hits + self.extra_hits
+        if model == 'product.template' and method == 'write':
+            ids, values = args
+            for template_id in ids:
+                self.prices[template_id] = values['list_price']
+            return True
+        raise AssertionError(f'unexpected call {model}.{method}')
+
+
+class BulkUpdateTest(unittest.TestCase):
+    
+    def setUp(self):
+        config = OdooConfig('http://odoo.test', 'db', 'user', 'secret')
+        self.updater = OdooPriceUpdater(config)
+        self.updater._multicall_supported = False
+        # Template 3 has two variants, each with its own barcode
+        self.odoo = FakeOdoo({'111': 1, '333': 3, '334': 3})
+        self.updater._get_exec = lambda: self.odoo
+    
+    def tearDown(self):
+        self.updater.close()
+    
+    def update(self, rows):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write('barcode,price\n' + ''.join(f'{row}\n' for row in rows))
+        self.addCleanup(os.remove, f.name)
+        return self.updater.bulk_update_from_csv(f.name)
+    
+    def test_multi_variant_template_barcode(self):
+        result = self.update(['333,3', '111,7'])
+        self.assertEqual(result['successful_updates'], 2)
+        self.assertEqual(self.odoo.prices, {3: 3.0, 1: 7.0})
+        self.assertEqual(self.updater.barcode_cache.get_many(['333']), {'333': [3]})
+    
+    def test_unrequested_barcode_in_response_is_ignored(self):
+        # A template-level hit without a barcode must not be matched to a row
+        self.odoo.extra_hits = [{'barcode': False, 'product_tmpl_id': [9, 'Template 9']}]
+        result = self.update(['333,3'])
+        self.assertEqual(result['successful_updates'], 1)
+        self.assertNotIn(9, self.odoo.prices)
+        self.assertEqual(self.updater.barcode_cache.get_many([False]), {})
+
+    
+    def test_shared_template_takes_latest_row_price(self):
+        result = self.update(['333,3', '334,4'])
+        self.assertEqual(self.odoo.prices, {3: 4.0})
+        messages = [r['message'] for r in result['results']]
+        self.assertEqual(messages, ['Updated 0 product(s) to $3.0 (1 superseded by a later row)',
+                                    'Updated 1 product(s) to $4.0'])
+    
+    def test_cached_template_id_takes_latest_row_price(self):
+        self.updater.barcode_cache.put_many({'999': [3]})
+        self.update(['334,4', '999,5'])
+        self.assertEqual(self.odoo.prices, {3: 5.0})
+
+    
+    def test_batch_size_below_one_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.updater.batch_update_from_csv('missing.csv', batch_size=0)
+        with self.assertRaises(ValueError):
+            self.updater.bulk_update_from_csv('missing.csv', batch_size=0)
+
+
+
+class BarcodeCacheTest(unittest.TestCase):
+    
+    def test_memory_hit_expires(self):
+        cache = BarcodeCache(ttl_hours=1)
+        with mock.patch('priceupdate.time.time', return_value=1000.0):
+            cache.put_many({'333': [3]})
+        with mock.patch('priceupdate.time.time', return_value=1000.0 + 3599):
+            self.assertEqual(cache.get_many(['333']), {'333': [3]})
+        with mock.patch('priceupdate.time.time', return_value=1000.0 + 3601):
+            self.assertEqual(cache.get_many(['333']), {})
+    
+    def test_shelf_entry_keeps_stored_at_in_memory(self):
+        path = os.path.join(tempfile.mkdtemp(), 'cache.db')
+        cache = BarcodeCache(path=path, ttl_hours=1)
+        with mock.patch('priceupdate.time.time', return_value=1000.0):
+            cache.put_many({'333': [3]})
+        cache.close()
+        
+        cache = BarcodeCache(path=path, ttl_hours=1)
+        self.addCleanup(cache.close)
+        with mock.patch('priceupdate.time.time', return_value=1000.0 + 3599):
+            self.assertEqual(cache.get_many(['333']), {'333': [3]})
+        with mock.patch('priceupdate.time.time', return_value=1000.0 + 3601):
+            self.assertEqual(cache.get_many(['333']), {})
+
+
+if __name__ == '__main__':
+    unittest.main()